@@ -1,46 +1,241 @@
 import tkinter as tk
 from tkinter import messagebox, ttk, simpledialog, filedialog
 from datetime import datetime, timedelta
-import json
 import os
 import tempfile
-from PIL import Image, ImageTk
-from dateutil import parser
-import matplotlib.pyplot as plt
-from collections import Counter
+import threading
+import queue
+import functools
+import pickle
+import mmap
+import heapq
+import hashlib
+import hmac
+from collections import Counter, defaultdict
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
 
 # --- File paths ---
 
-DATA_FILE   = 'inventory_data.json'        # Inventory data storage
-SALES_FILE  = 'sales_history.json'         # Sales history data storage
-USERS_FILE  = 'users.json'                 # User credentials storage
+DATA_FILE   = 'inventory_data.json'        # Inventory snapshot (compacted periodically)
+INVENTORY_LOG = 'inventory.log'            # Inventory changes since the last snapshot
+DT_FORMAT   = "%Y-%m-%d %H:%M:%S"          # Sale timestamp format (sorts chronologically)
+SALES_FILE  = 'sales_history.jsonl'        # Sales history, one JSON record per line
+LEGACY_SALES_FILE = 'sales_history.json'   # Old whole-list sales file, migrated on load
+USERS_FILE  = 'users.json'                 # User credentials storage (password digests)
+PASSWORD_KEY = b"DSA_LAB_SALT"             # Key for the blake2b password digests
 LOW_STOCK_THRESHOLD = 5                    # Threshold for low stock alert
 ICON_DIR    = 'icons'                      # Directory where icons are stored
+ICON_CACHE_FILE = 'icons.cache'            # Decoded icon pixels, reused across launches
+ICON_SIZE   = (24, 24)                     # Button icon size
+ICON_NAMES  = [
+    'view','add','update','delete','search','charts','reports','incoming','outgoing',
+    'sale_add','sale_complete','sale_history','sale_print'
+]
+TREE_BATCH  = 500                          # Treeview rows inserted per event-loop turn
+COMPACT_DELAY = 5.0                        # Seconds to coalesce inventory writes
+JSON_DEBUG  = False                        # Indent saved JSON files for easier reading
+
+# --- JSON backend: orjson if available, then ujson, then the standard library ---
+
+try:
+    import orjson
+    json_loads = orjson.loads
+    def json_dumps(data, pretty=False):
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+except ImportError:
+    try:
+        import ujson as _json
+        def json_dumps(data, pretty=False):
+            return _json.dumps(data, indent=2 if pretty else 0).encode('utf-8')
+    except ImportError:
+        import json as _json
+        def json_dumps(data, pretty=False):
+            if pretty:
+                return _json.dumps(data, indent=2).encode('utf-8')
+            return _json.dumps(data, separators=(',', ':')).encode('utf-8')
+    json_loads = _json.loads
 
 # --- Data persistence ---
 
+_persist_lock  = threading.Lock()   # Serializes log appends against compaction
+_compact_timer = None               # Pending compaction, if any
+
 def load_json(path, default):
     # Load data from a JSON file, or return default if file doesn't exist
     if os.path.exists(path):
-        with open(path, 'r') as f:
-            return json.load(f)
+        with open(path, 'rb') as f:
+            return json_loads(f.read())
     return default
 
 def save_json(path, data):
-    # Save data to a JSON file
-    with open(path, 'w') as f:
-        json.dump(data, f, indent=4)
+    # Atomically save data to a JSON file: write a temp file next to it, then rename
+    folder = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile('wb', dir=folder, suffix='.tmp', delete=False) as f:
+        f.write(json_dumps(data, JSON_DEBUG))
+    os.replace(f.name, path)
+
+def save_jsonl(path, records):
+    # Atomically write records as a JSON-lines file (temp file + rename, like save_json)
+    folder = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile('wb', dir=folder, suffix='.tmp', delete=False) as f:
+        for record in records:
+            f.write(json_dumps(record) + b"\n")
+    os.replace(f.name, path)
+
+def append_bytes(path, data):
+    # Append raw bytes to a file, first ending any partial last line left by a crash so the
+    # new data never joins onto it; returns the offset the data was written at
+    with open(path, 'a+b') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        if end:
+            f.seek(end - 1)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+                end += 1
+        f.write(data)   # append mode: always written at the end
+    return end
+
+def append_jsonl(path, record):
+    # Append one record as a single JSON line
+    append_bytes(path, json_dumps(record) + b"\n")
+
+def load_jsonl(path):
+    # Load a JSON-lines file into a list, skipping blank or unparseable (e.g. crash-truncated) lines
+    records = []
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    records.append(json_loads(line))
+                except ValueError:
+                    continue
+    return records
+
+def load_inventory():
+    # Load the inventory snapshot and replay any logged changes on top of it
+    inv = load_json(DATA_FILE, {})
+    for op in load_jsonl(INVENTORY_LOG):
+        if op.get("op") == "set":
+            inv[op["id"]] = op["item"]
+        elif op.get("op") == "del":
+            inv.pop(op["id"], None)
+    return inv
+
+def iter_jsonl(path, offsets=None):
+    # Stream (offset, record) pairs from a memory-mapped JSON-lines file, or only the lines at `offsets`
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if offsets is None:
+            pos = 0
+            for line in iter(mm.readline, b''):
+                try:
+                    yield pos, json_loads(line)
+                except ValueError:
+                    pass
+                pos += len(line)
+        else:
+            for pos in offsets:
+                try:
+                    mm.seek(pos)
+                    record = json_loads(mm.readline())
+                except ValueError:   # offset past the end, or not a valid line
+                    continue
+                yield pos, record
+
+def is_sale_dt(text):
+    # Cheap shape check for a DT_FORMAT timestamp ("YYYY-MM-DD HH:MM:SS") without parsing it
+    return (isinstance(text, str) and len(text) == 19 and text[4] == text[7] == "-"
+            and text[10] == " " and text[13] == text[16] == ":")
+
+def sale_key(record):
+    # Sort key for a sale; a missing datetime sorts before every real one, so no report window includes it
+    dt = record.get("datetime")
+    return dt if isinstance(dt, str) else ""
+
+def load_sales_index():
+    # Index the sales file without keeping the records: (datetime keys, byte offsets) sorted by
+    # datetime. Converts an old sales_history.json on first run.
+    if not os.path.exists(SALES_FILE) and os.path.exists(LEGACY_SALES_FILE):
+        save_jsonl(SALES_FILE, load_json(LEGACY_SALES_FILE, []))
+    pairs = [(sale_key(s), pos) for pos, s in iter_jsonl(SALES_FILE)]
+    pairs.sort(key=itemgetter(0))
+    return [k for k,_ in pairs], [o for _,o in pairs]
+
+def inventory_op(item_id):
+    # Log entry describing the current state of one item (a copy, safe to hand to another thread)
+    itm = inventory.get(item_id)
+    if itm is None:
+        return {"op": "del", "id": item_id}
+    return {"op": "set", "id": item_id, "item": dict(itm)}
+
+def log_inventory(op):
+    # Record a change to one item and schedule a compaction of the snapshot
+    with _persist_lock:
+        append_jsonl(INVENTORY_LOG, op)
+    schedule_compaction()
+
+def schedule_compaction():
+    # Start the compaction timer unless one is already pending
+    global _compact_timer
+    with _persist_lock:
+        if _compact_timer is None:
+            _compact_timer = threading.Timer(COMPACT_DELAY, compact_inventory)
+            _compact_timer.daemon = True    # Anything not compacted is replayed from the log
+            _compact_timer.start()
+
+def compact_inventory():
+    # Rewrite the inventory snapshot and drop the log it now covers
+    global _compact_timer
+    with _persist_lock:
+        _compact_timer = None
+        snapshot = {i: dict(it) for i, it in dict(inventory).items()}
+        save_json(DATA_FILE, snapshot)
+        if os.path.exists(INVENTORY_LOG):
+            os.remove(INVENTORY_LOG)
+
+@functools.lru_cache(maxsize=1024)
+def format_price(price):
+    # Receipt-ready price string; cached since the same few prices are formatted on every sale
+    return f"{price:.2f}"
 
 # Load existing data from files or use default
-inventory     = load_json(DATA_FILE, {})
-sales_history = load_json(SALES_FILE, [])
+inventory     = load_inventory()
 USERS         = load_json(USERS_FILE, {})
 
+# --- Passwords ---
+
+def hash_password(p):
+    # 32-hex-character keyed blake2b digest stored in USERS instead of the password
+    return hashlib.blake2b(p.encode('utf-8'), digest_size=16, key=PASSWORD_KEY).hexdigest()
+
+def is_password_hash(value):
+    # Anything that isn't exactly 32 hex characters is a legacy plaintext password
+    return isinstance(value, str) and len(value) == 32 and all(c in "0123456789abcdef" for c in value)
+
+def check_password(u, p):
+    # Verify a login, upgrading a legacy plaintext password to a digest when it matches
+    stored = USERS.get(u)
+    if stored is None:
+        return False
+    if is_password_hash(stored):
+        return hmac.compare_digest(stored, hash_password(p))
+    if hmac.compare_digest(str(stored).encode('utf-8'), p.encode('utf-8')):
+        USERS[u] = hash_password(p)
+        save_json(USERS_FILE, USERS)
+        return True
+    return False
+
 # --- Login window ---
 
-def login_window(on_success):
-    # Create the login window
-    win = tk.Tk()
+def login_window(on_success, root=None):
+    # Create the login window on the shared (hidden) root; on_success(root) runs once logged in
+    if root is None:
+        root = tk.Tk()
+        root.withdraw()
+    win = tk.Toplevel(root)
     win.title("Login")
     win.geometry("400x450")
     win.configure(bg="#5F9EA0")
@@ -60,70 +255,105 @@ def login_window(on_success):
     pwd_ent  = tk.Entry(win, show='*'); pwd_ent.pack()
 
     # Function for login button
+    logged_in = [False]
     def do_login():
         u, p = user_ent.get(), pwd_ent.get()
-        if USERS.get(u) == p:
+        if check_password(u, p):
+            logged_in[0] = True
             win.destroy()
-            on_success()
         else:
-            messagebox.showerror("Login Failed", "Invalid credentials")
+            messagebox.showerror("Login Failed", "Invalid credentials", parent=win)
 
     # Function for register button
     def do_register():
-        u = simpledialog.askstring("Register", "Username:")
-        p = simpledialog.askstring("Register", "Password:", show='*')
+        u = simpledialog.askstring("Register", "Username:", parent=win)
+        p = simpledialog.askstring("Register", "Password:", show='*', parent=win)
         if u and p and u not in USERS:
-            USERS[u] = p
+            USERS[u] = hash_password(p)
             save_json(USERS_FILE, USERS)
-            messagebox.showinfo("Success", "Registered")
+            messagebox.showinfo("Success", "Registered", parent=win)
         else:
-            messagebox.showerror("Error", "Invalid or existing user")
+            messagebox.showerror("Error", "Invalid or existing user", parent=win)
 
     # Function for password reset
     def do_reset():
-        u = simpledialog.askstring("Reset Password", "Username:")
+        u = simpledialog.askstring("Reset Password", "Username:", parent=win)
         if u in USERS:
-            p = simpledialog.askstring("Reset Password", "New password:", show='*')
-            USERS[u] = p
+            p = simpledialog.askstring("Reset Password", "New password:", show='*', parent=win)
+            if not p: return
+            USERS[u] = hash_password(p)
             save_json(USERS_FILE, USERS)
-            messagebox.showinfo("Success", "Password reset")
+            messagebox.showinfo("Success", "Password reset", parent=win)
         else:
-            messagebox.showerror("Error", "User not found")
+            messagebox.showerror("Error", "User not found", parent=win)
 
     # Create login, register, and reset buttons
-    for txt, cmd in [
-        ("Login", do_login),
-        ("Register", do_register),
-        ("Forgot Password", do_reset)
-    ]:
-        tk.Button(
-            win, text=txt, width=15, bg="#d9f0ff", fg="dark blue", activebackground="#45a049",
-            font=("Arial", 12, "bold"), pady=4, command=cmd
-        ).pack(pady=5)
-
-    win.mainloop()
+    style = dict(width=15, bg="#d9f0ff", fg="dark blue", activebackground="#45a049",
+                 font=("Arial", 12, "bold"), pady=4)
+    for txt, cmd in (("Login", do_login), ("Register", do_register), ("Forgot Password", do_reset)):
+        tk.Button(win, text=txt, command=cmd, **style).pack(pady=5)
+
+    # Run the event loop until the login window closes, then hand the root to the app
+    root.wait_window(win)
+    if logged_in[0]:
+        root.deiconify()
+        on_success(root)
+    else:
+        root.destroy()
+
+# --- Search helpers ---
+
+def _grams(texts):
+    # Set of 3-character substrings across the given strings
+    return {t[k:k+3] for t in texts for k in range(len(t) - 2)}
 
 # --- Modal dialog helper ---
 
 class ModalDialog:
+    _dialog_pool = {}   # (parent, field specs) -> hidden dialog reused by later prompts with the same fields
+
     def __init__(self, parent, title, fields):
-        # Create a popup modal dialog window for user input
-        self.top = tk.Toplevel(parent)
+        # Show a popup modal dialog window for user input, reusing a pooled one when the fields match
+        key = (str(parent), tuple(tuple(spec) for spec in fields))
+        pooled = self._dialog_pool.get(key)
+        if pooled and pooled["top"].winfo_exists():
+            for ent, _ in pooled["entries"].values():
+                ent.delete(0, "end")
+            pooled["top"].deiconify()
+        else:
+            pooled = self._dialog_pool[key] = self._build(parent, fields)
+        pooled["owner"] = self   # the OK button and close box act on the current prompt
+        self.top, self.entries, self.done = pooled["top"], pooled["entries"], pooled["done"]
         self.top.title(title)
-        self.entries = {}
+        self.value = None
+        self.done.set(False)
+        self.top.grab_set()
+        parent.wait_variable(self.done)
+
+    @staticmethod
+    def _build(parent, fields):
+        # Create the dialog widgets once; buttons dispatch to whichever ModalDialog owns them now
+        top = tk.Toplevel(parent)
+        pooled = {"top": top, "entries": {}, "done": tk.BooleanVar(top), "owner": None}
         for i, spec in enumerate(fields):
             label, typ = spec[0], spec[1]
             show = '*' if len(spec) > 2 and spec[2] else None
-            tk.Label(self.top, text=label).grid(row=i, column=0, padx=10, pady=5, sticky="e")
-            ent = tk.Entry(self.top, show=show)
+            tk.Label(top, text=label).grid(row=i, column=0, padx=10, pady=5, sticky="e")
+            ent = tk.Entry(top, show=show)
             ent.grid(row=i, column=1, padx=10, pady=5)
-            self.entries[label] = (ent, typ)
-        tk.Button(self.top, text="OK", command=self._on_ok).grid(
+            pooled["entries"][label] = (ent, typ)
+        tk.Button(top, text="OK", command=lambda: pooled["owner"]._on_ok()).grid(
             row=len(fields), column=0, columnspan=2, pady=10
         )
-        self.value = None
-        self.top.grab_set()
-        parent.wait_window(self.top)
+        top.protocol("WM_DELETE_WINDOW", lambda: pooled["owner"]._close())
+        top.bind("<Destroy>", lambda e: pooled["done"].set(True))   # never leave wait_variable hanging
+        return pooled
+
+    def _close(self):
+        # Hide the dialog for reuse and release the waiting caller
+        self.top.grab_release()
+        self.top.withdraw()
+        self.done.set(True)
 
     def _on_ok(self):
         # Gather user input and close dialog if valid
@@ -141,7 +371,7 @@ class ModalDialog:
             messagebox.showerror("Error", "Please enter valid values")
             return
         self.value = res
-        self.top.destroy()
+        self._close()
 
     def result(self):
         # Return collected input values
@@ -150,33 +380,36 @@ class ModalDialog:
     
     
 class InventorySystem:
-    def __init__(self):
+    def __init__(self, root=None):
         # Initialize sale-related variables
-        self.current_sale = {}   # Tracks items currently being added to a sale
+        self.current_sale = self._new_sale()   # Tracks items currently being added to a sale
         self.last_receipt  = ""  # Stores last receipt content as string
+        self._search_win   = None  # (Toplevel, Treeview) of the open search window
+
+        # Lowercased ID/name per item plus a trigram index, kept in step with inventory
+        self._search_index = {}                 # id -> (id_lower, name_lower)
+        self._trigrams     = defaultdict(set)   # 3-gram -> ids containing it
+        self._search_rank  = {}                 # id -> insertion rank, to list matches in inventory order
+        self._next_rank    = 0
+        for i in inventory:
+            self._reindex(i)
+
+        # IDs currently below LOW_STOCK_THRESHOLD, updated only for items that change
+        self._low_stock = {i for i,it in inventory.items() if it.get("quantity",0) < LOW_STOCK_THRESHOLD}
+
+        # Sorted sale datetimes and the byte offset of each sale in SALES_FILE, for bisecting report
+        # windows; records themselves are streamed from the file when needed. Sales the I/O worker
+        # has not written yet stay in _pending_sales until their offset is known.
+        self._sales_dt_keys, self._sales_offsets = load_sales_index()
+        self._pending_sales = []
 
         # Set up the main application window
-        self.root = tk.Tk()
+        self.root = root or tk.Tk()
         self.root.title("Inventory Management System")
         self.root.geometry("800x600")
 
         # Load all icons from ICON_DIR folder for buttons
-        self.icons = {}
-        for name in [
-            'view','add','update','delete','search','charts','reports','incoming','outgoing',
-            'sale_add','sale_complete','sale_history','sale_print'
-        ]:
-            img_obj = None
-            for ext in ('.png','.jpg','.jpeg'):  # Try supported extensions
-                path = os.path.join(ICON_DIR, name + ext)
-                if os.path.exists(path):
-                    try:
-                        img = Image.open(path).convert("RGB").resize((24, 24))  # Resize and format
-                        img_obj = ImageTk.PhotoImage(img)
-                    except Exception as e:
-                        print(f"Error loading {path}: {e}")
-                    break
-            self.icons[name] = img_obj  # Save icon image or None if not found
+        self.icons = self._load_icons()
 
         # Create tabbed interface with two tabs: Owner and Sales
         nb = ttk.Notebook(self.root)
@@ -190,8 +423,135 @@ class InventorySystem:
         self._build_owner_page()
         self._build_sales_page()
 
+        # Start the I/O worker so disk writes and printing never block the UI
+        self._io_q       = queue.Queue()   # jobs for the worker
+        self._io_results = queue.Queue()   # (messagebox function, args) to show on the UI thread
+        threading.Thread(target=self._io_worker, daemon=True).start()
+        self.root.after(50, self._drain_results)
+
         # Start the application main loop
         self.root.mainloop()
+        self._io_q.join()   # Finish pending writes before exiting
+
+    # Run queued I/O jobs: ("log", op), ("sale", record) and ("print", text)
+    def _io_worker(self):
+        while True:
+            job = self._io_q.get()
+            try:
+                if job[0] == "log":
+                    log_inventory(job[1])
+                elif job[0] == "sale":
+                    pos = append_bytes(SALES_FILE, json_dumps(job[1]) + b"\n")
+                    self._io_results.put((self._index_sale, (job[1], pos)))
+                elif job[0] == "print":
+                    self._print_file(job[1])
+            except Exception as e:
+                self._io_results.put((messagebox.showerror, ("Error", f"{job[0].capitalize()} failed: {e}")))
+            finally:
+                self._io_q.task_done()
+
+    # Show results posted by the I/O worker, then poll again
+    def _drain_results(self):
+        while True:
+            try:
+                show, args = self._io_results.get_nowait()
+            except queue.Empty:
+                break
+            show(*args)
+        self.root.after(50, self._drain_results)
+
+    # Return name -> PhotoImage (or None), decoding from ICON_CACHE_FILE when ICON_DIR is unchanged
+    def _load_icons(self):
+        from PIL import Image, ImageTk   # Imported here so PIL only loads for the main window
+        # The cache is keyed on the icons/ directory mtime, which changes when files are added, removed
+        # or renamed but not when an icon is overwritten in place; delete icons.cache after doing that
+        try:
+            mtime = os.path.getmtime(ICON_DIR)
+        except OSError:
+            mtime = None
+        raw = None
+        if os.path.exists(ICON_CACHE_FILE):
+            try:
+                with open(ICON_CACHE_FILE, 'rb') as f:
+                    cached = pickle.load(f)
+                if cached.get("mtime") == mtime and cached.get("size") == ICON_SIZE:
+                    raw = cached["icons"]
+            except Exception as e:
+                print(f"Ignoring icon cache: {e}")
+
+        if raw is None:
+            # Cache miss: decode the image files and remember their pixels
+            raw = {}
+            exts = ('.png','.jpg','.jpeg')   # Supported extensions, in order of preference
+            files = {}   # icon name -> (extension rank, path), from one directory listing
+            try:
+                with os.scandir(ICON_DIR) as it:
+                    for e in it:
+                        stem, ext = os.path.splitext(e.name.lower())
+                        if ext in exts:
+                            rank = exts.index(ext)
+                            if stem not in files or rank < files[stem][0]:
+                                files[stem] = (rank, e.path)
+            except OSError:
+                pass
+            for name in ICON_NAMES:
+                path = files.get(name, (None, None))[1]
+                if path:
+                    try:
+                        img = Image.open(path).convert("RGBA")
+                        img.thumbnail(ICON_SIZE, Image.Resampling.BILINEAR)  # In-place, keeps aspect
+                        raw[name] = (img.size, img.tobytes())
+                    except Exception as e:
+                        print(f"Error loading {path}: {e}")
+            try:
+                with open(ICON_CACHE_FILE, 'wb') as f:
+                    pickle.dump({"mtime": mtime, "size": ICON_SIZE, "icons": raw}, f)
+            except OSError as e:
+                print(f"Could not write icon cache: {e}")
+
+        # PhotoImages belong to this window's Tk interpreter, so they are built fresh from the pixels
+        icons = {}
+        for name in ICON_NAMES:
+            if name in raw:
+                size, data = raw[name]
+                icons[name] = ImageTk.PhotoImage(Image.frombytes("RGBA", size, data), master=self.root)
+            else:
+                icons[name] = None  # not found
+        return icons
+
+    # Refresh the search index entry for one item (removes it if the item was deleted)
+    def _reindex(self, i):
+        old = self._search_index.get(i)   # overwritten in place below so the entry keeps inventory order
+        if old:
+            for g in _grams(old):
+                ids = self._trigrams[g]
+                ids.discard(i)
+                if not ids:
+                    del self._trigrams[g]
+        it = inventory.get(i)
+        if it is None:
+            self._search_index.pop(i, None)
+            self._search_rank.pop(i, None)
+            return
+        entry = (i.lower(), it.get("name","").lower())
+        self._search_index[i] = entry
+        if i not in self._search_rank:   # new items go to the end of inventory, so they rank last
+            self._search_rank[i] = self._next_rank
+            self._next_rank += 1
+        for g in _grams(entry):
+            self._trigrams[g].add(i)
+
+    # Return IDs whose ID or name contains the (lowercased) query
+    def _find(self, q):
+        if len(q) < 3:
+            return [i for i,(il,nl) in self._search_index.items() if q in il or q in nl]
+        # Every match contains all of the query's trigrams; confirm the substring on that subset
+        sets = sorted((self._trigrams.get(g, set()) for g in _grams((q,))), key=len)
+        if not sets[0]:
+            return []
+        cands = set.intersection(*sets)
+        index = self._search_index
+        return sorted((i for i in cands if q in index[i][0] or q in index[i][1]), key=self._search_rank.get)
 
     # ---------------------- Owner Page Layout ---------------------- #
     def _build_owner_page(self):
@@ -275,17 +635,56 @@ class InventorySystem:
             btn.image = ico
             btn.grid(row=i//2, column=i%2, padx=10, pady=10)
 
-        # Display the current inventory in a new top-level window using a Treeview widget
+    # Display the current inventory in a new top-level window using a Treeview widget
     def _view_inventory(self):
+        top, tree = self._tree_window("Current Inventory")
+        self._fill_tree(tree, self._tree_rows(inventory))
+
+    # Create a Toplevel with an ID/Name/Qty/Price Treeview
+    def _tree_window(self, title):
         top = tk.Toplevel(self.root)
-        top.title("Current Inventory")
+        top.title(title)
         tree = ttk.Treeview(top, columns=("ID","Name","Qty","Price"), show="headings")
-        for c in (["ID","Name","Qty","Price"]):
+        for c in ("ID","Name","Qty","Price"):
             tree.heading(c, text=c)
             tree.column(c, anchor="center")
         tree.pack(expand=True, fill="both", padx=10, pady=10)
-        for i, it in inventory.items():
-            tree.insert("", "end", values=(i, it.get("name",""), it.get("quantity",0), it.get("price",0.0)))
+        tree.fill_job = None
+        return top, tree
+
+    # Treeview rows for the given item IDs
+    @staticmethod
+    def _tree_rows(ids):
+        rows = []
+        for i in ids:
+            it = inventory[i]
+            rows.append((i, it.get("name",""), it.get("quantity",0), it.get("price",0.0)))
+        return rows
+
+    # "name xqty, ..." for a sale's items, with one inventory lookup per item
+    @staticmethod
+    def _items_str(items):
+        parts = []
+        for i,q in items.items():
+            it = inventory.get(i)
+            parts.append(f"{it.get('name',i) if it else i} x{q}")
+        return ", ".join(parts)
+
+    # Replace the tree's rows, inserting TREE_BATCH per turn of the event loop so large catalogs stay responsive
+    def _fill_tree(self, tree, rows, start=0):
+        if not tree.winfo_exists():   # window closed while batches were pending
+            return
+        if start == 0:
+            if tree.fill_job:
+                tree.after_cancel(tree.fill_job)
+            tree.delete(*tree.get_children())
+        tree.configure(displaycolumns=())   # no visible columns to lay out while rows go in
+        insert = tree.insert
+        for row in rows[start:start+TREE_BATCH]:
+            insert("", "end", values=row)
+        tree.configure(displaycolumns="#all")
+        start += TREE_BATCH
+        tree.fill_job = tree.after(1, self._fill_tree, tree, rows, start) if start < len(rows) else None
 
     # Add a new item to the inventory after checking for ID uniqueness
     def _add_item(self):
@@ -297,9 +696,10 @@ class InventorySystem:
             messagebox.showerror("Error", "ID exists")
         else:
             inventory[i] = {"name":n, "quantity":q, "price":p}
-            save_json(DATA_FILE, inventory)
+            self._io_q.put(("log", inventory_op(i)))
+            self._reindex(i)
             messagebox.showinfo("Success","Item added")
-            self._low_stock_check()
+            self._low_stock_check([i])
 
     # Update an existing inventory item's details
     def _update_item(self):
@@ -314,9 +714,10 @@ class InventorySystem:
         r2 = dlg2.result()
         if not r2: return
         itm["name"], itm["quantity"], itm["price"] = r2["Name"], r2["Quantity"], r2["Price"]
-        save_json(DATA_FILE, inventory)
+        self._io_q.put(("log", inventory_op(i)))
+        self._reindex(i)
         messagebox.showinfo("Success","Item updated")
-        self._low_stock_check()
+        self._low_stock_check([i])
 
     # Delete an item from the inventory using its ID
     def _delete_item(self):
@@ -326,7 +727,9 @@ class InventorySystem:
         i = r["ID"]
         if i in inventory:
             del inventory[i]
-            save_json(DATA_FILE, inventory)
+            self._io_q.put(("log", inventory_op(i)))
+            self._reindex(i)
+            self._update_low_stock(i)
             messagebox.showinfo("Success","Item deleted")
         else:
             messagebox.showerror("Error","Not found")
@@ -337,22 +740,14 @@ class InventorySystem:
         r = dlg.result()
         if not r: return
         q = r["Query"].lower()
-        results = [(i,it) for i,it in inventory.items()
-                   if q in i.lower() or q in it.get("name","").lower()]
-        top = tk.Toplevel(self.root)
+        # Reuse the search window (and its tree) while it is open
+        if self._search_win and self._search_win[0].winfo_exists():
+            top, tree = self._search_win
+            top.lift()
+        else:
+            top, tree = self._search_win = self._tree_window("Search")
         top.title(f"Search: {r['Query']}")
-        tree = ttk.Treeview(top, columns=("ID","Name","Qty","Price"), show="headings")
-        for c in ("ID","Name","Qty","Price"):
-            tree.heading(c, text=c)
-            tree.column(c, anchor="center")
-        tree.pack(expand=True, fill="both", padx=10, pady=10)
-        for i,it in results:
-            tree.insert("", "end", values=(
-                i,
-                it.get("name",""),
-                it.get("quantity",0),
-                it.get("price",0.0)
-            ))
+        self._fill_tree(tree, self._tree_rows(self._find(q)))
 
     # Add incoming stock quantity to an existing inventory item
     def _incoming_stock(self):
@@ -362,9 +757,9 @@ class InventorySystem:
         i,q = r["ID"], r["Quantity"]
         if i in inventory:
             inventory[i]["quantity"] = inventory[i].get("quantity",0) + q
-            save_json(DATA_FILE, inventory)
+            self._io_q.put(("log", inventory_op(i)))
             messagebox.showinfo("Success","Stock updated")
-            self._low_stock_check()
+            self._low_stock_check([i])
         else:
             messagebox.showerror("Error","Invalid ID")
 
@@ -376,22 +771,25 @@ class InventorySystem:
         i,q = r["ID"], r["Quantity"]
         if i in inventory and inventory[i].get("quantity",0) >= q:
             inventory[i]["quantity"] -= q
-            save_json(DATA_FILE, inventory)
+            self._io_q.put(("log", inventory_op(i)))
             messagebox.showinfo("Success","Stock updated")
-            self._low_stock_check()
+            self._low_stock_check([i])
         else:
             messagebox.showerror("Error","Invalid ID or insufficient stock")
 
     # Show a bar chart of all inventory item quantities using matplotlib
     def _show_charts(self):
-        names = [it.get("name","") for it in inventory.values()]
-        qtys  = [it.get("quantity",0) for it in inventory.values()]
+        import matplotlib.pyplot as plt   # Deferred: matplotlib start-up is slow and most sessions never chart
+        names, qtys = [], []   # one pass over inventory builds both chart columns
+        for it in inventory.values():
+            names.append(it.get("name",""))
+            qtys.append(it.get("quantity",0))
         plt.bar(names, qtys)
         plt.xticks(rotation=45)
         plt.title("Inventory Levels")
         plt.ylabel("Quantity")
         plt.tight_layout()
-        plt.show()
+        plt.show(block=False)   # The Tk main loop keeps the chart window responsive
 
     # Generate a sales report between two dates, showing summary and individual sales
     def _sales_report(self):
@@ -407,72 +805,87 @@ class InventorySystem:
         except:
             return messagebox.showerror("Error","Bad date format")
 
-        top = tk.Toplevel(self.root); top.title("Sales Report")
-        canvas = tk.Canvas(top, width=900, height=500)
-        sb     = tk.Scrollbar(top, orient="vertical", command=canvas.yview)
-        frm    = tk.Frame(canvas)
-        frm.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0,0), window=frm, anchor="nw")
-        canvas.configure(yscrollcommand=sb.set)
-        canvas.pack(side="left", fill="both", expand=True)
-        sb.pack(side="right", fill="y")
-
         total_sales = 0.0
         total_items = 0
         cnt = Counter()
         found = False
+        entries = []
 
-        for s in sales_history:
-            # parse date & skip if malformed
-            dt = s.get("datetime")
-            try:
-                t = parser.parse(dt) if dt else None
-            except:
-                continue
-            if not t or not (sd <= t < ed):
+        # Only the sales inside [sd, ed) need visiting
+        for s in self._iter_sales(sd.strftime(DT_FORMAT), ed.strftime(DT_FORMAT)):
+            if not is_sale_dt(s.get("datetime")):   # skip malformed dates
                 continue
             found = True
             subtotal = s.get("total", 0.0)
             total_sales += subtotal
             items = s.get("items", {})
-            count_items = s.get("total_items", sum(items.values()))
-            total_items += count_items
-            cnt.update(items)
-            items_str = ", ".join(f"{inventory.get(i,{}).get('name',i)} x{q}" for i,q in items.items())
-            txt = (
-                f"{t.strftime('%Y-%m-%d %H:%M:%S')}\n"
+            count_items = 0
+            for i,q in items.items():   # one pass for both the per-item and the total counts
+                cnt[i] += q
+                count_items += q
+            total_items += s.get("total_items", count_items)
+            items_str = self._items_str(items)
+            entries.append(
+                f"{s['datetime']}\n"
                 f"Items: {items_str}\n"
                 f"Subtotal: {subtotal:.2f}\n"
             )
-            tk.Label(frm, text=txt, justify="left").pack(anchor="w", padx=5, pady=5)
 
         if not found:
-            tk.Label(frm, text="No sales found for this range.", fg="red")\
-              .pack(pady=20)
+            self._text_window("Sales Report", "No sales found for this range.", "error")
         else:
-            most = cnt.most_common(1)[0][0] if cnt else None
-            name_most = inventory.get(most, {}).get("name", "N/A")
+            most = max(cnt.items(), key=itemgetter(1))[0] if cnt else None
+            it = inventory.get(most)
+            name_most = it.get("name", "N/A") if it else "N/A"
             summary = (
                 f"Total Sales: {total_sales:.2f}\n"
                 f"Total Items Sold: {total_items}\n"
                 f"Most Sold Item: {name_most}"
             )
-            tk.Label(frm, text=summary, font=("Arial",12,"bold"))\
-              .pack(anchor="w", padx=5, pady=10)
-
-    # Check inventory for items below a defined low-stock threshold
-    def _low_stock_check(self):
-        lows = [
-            (it.get("name",""), it.get("quantity",0))
-            for it in inventory.values()
-            if it.get("quantity",0) < LOW_STOCK_THRESHOLD
-        ]
+            self._text_window("Sales Report", "\n".join(entries) + "\n", "", summary, "bold")
+
+    # Open a read-only scrollable Text window; args are text, tag, text, tag, ... as for Text.insert
+    def _text_window(self, title, *chunks):
+        top = tk.Toplevel(self.root); top.title(title)
+        txt = tk.Text(top, wrap="word", width=110, height=30, padx=5, pady=5)
+        sb  = tk.Scrollbar(top, orient="vertical", command=txt.yview)
+        txt.configure(yscrollcommand=sb.set)
+        txt.tag_configure("bold", font=("Arial",12,"bold"))
+        txt.tag_configure("error", foreground="red")
+        txt.pack(side="left", fill="both", expand=True)
+        sb.pack(side="right", fill="y")
+        txt.insert("1.0", *chunks)
+        txt.configure(state="disabled")
+
+    # Re-evaluate one item against the threshold; True if it has just become low
+    def _update_low_stock(self, i):
+        it = inventory.get(i)
+        if it is not None and it.get("quantity",0) < LOW_STOCK_THRESHOLD:
+            if i in self._low_stock:
+                return False
+            self._low_stock.add(i)
+            return True
+        self._low_stock.discard(i)
+        return False
+
+    # Alert on low stock: every low item at startup, afterwards only the given IDs that just became low
+    def _low_stock_check(self, ids=None):
+        if ids is None:
+            new = [i for i in inventory if i in self._low_stock]
+        else:
+            new = [i for i in ids if self._update_low_stock(i)]
+        lows = [(inventory[i].get("name",""), inventory[i].get("quantity",0)) for i in new]
         if lows:
             msg = "\n".join(f"{n} (Qty:{q})" for n,q in lows)
             messagebox.showwarning("Low Stock Alert", msg)
 
     # --- Sales page ---
 
+    # Empty cart: quantities per ID plus the running totals and, per ID, (line total, receipt line)
+    @staticmethod
+    def _new_sale():
+        return {"items": {}, "running_total": 0.0, "running_count": 0, "lines": {}}
+
     # Add selected item to the current sale (cart) after validation
     def _add_to_sale(self):
         dlg = ModalDialog(self.root, "Add to Sale", [("ID",str),("Quantity",int)])
@@ -481,50 +894,56 @@ class InventorySystem:
         i,q = r["ID"], r["Quantity"]
         if i not in inventory or q <= 0 or q > inventory[i].get("quantity",0):
             return messagebox.showerror("Error","Invalid ID or quantity")
-        self.current_sale[i] = self.current_sale.get(i,0) + q
-        messagebox.showinfo("Added", f"{q} x {inventory[i].get('name','')}")
+        sale = self.current_sale
+        it = inventory[i]
+        name, price = it.get("name",""), it.get("price",0.0)
+        price_fmt = format_price(price)
+        qty = sale["items"][i] = sale["items"].get(i,0) + q
+        line_total = price*qty
+        old_total, _ = sale["lines"].get(i, (0.0, ""))
+        sale["running_total"] += line_total - old_total   # one merged line per item, as in record["items"]
+        sale["running_count"] += q
+        sale["lines"][i] = (line_total, f"{name} x{qty} @ {price_fmt} = {line_total:.2f}")
+        messagebox.showinfo("Added", f"{q} x {name}")
 
     # Complete the sale transaction, generate receipt, update stock and records
     def _complete_sale(self):
-        if not self.current_sale:
+        sale = self.current_sale
+        if not sale["items"]:
             return messagebox.showwarning("Empty Sale","No items in current sale")
         dlg = ModalDialog(self.root, "Complete Sale", [("Discount (%)",float),("Money Given",float)])
         r = dlg.result()
         if not r: return
         disc, money = r["Discount (%)"], r["Money Given"]
-        total = sum(inventory[i].get("price",0.0)*q for i,q in self.current_sale.items())
+        total = sale["running_total"]
         discount_amt = total * disc/100
         subtotal = total - discount_amt
         if money < subtotal:
             return messagebox.showerror("Error","Insufficient money")
         change = money - subtotal
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        now = datetime.now().strftime(DT_FORMAT)
 
         # build record
         record = {
             "datetime": now,
-            "items": self.current_sale.copy(),
+            "items": sale["items"].copy(),
             "total": subtotal,
             "money_given": money,
             "change_due": change,
             "discount": disc,
-            "total_items": sum(self.current_sale.values())
+            "total_items": sale["running_count"]
         }
         # update inventory
-        for i,q in self.current_sale.items():
+        for i,q in sale["items"].items():
             inventory[i]["quantity"] = inventory[i].get("quantity",0) - q
+            self._io_q.put(("log", inventory_op(i)))
 
-        sales_history.append(record)
-        save_json(DATA_FILE, inventory)
-        save_json(SALES_FILE, sales_history)
+        # held in memory until the worker reports where in SALES_FILE it was written
+        self._pending_sales.append(record)
+        self._io_q.put(("sale", record))
 
         # show receipt
-        lines = [
-            f"{inventory.get(i,{}).get('name',i)} x{q} @ {inventory.get(i,{}).get('price',0.0):.2f}"
-            f" = {inventory.get(i,{}).get('price',0.0)*q:.2f}"
-            for i,q in record["items"].items()
-        ]
-        receipt = f"Receipt - {now}\n" + "\n".join(lines)
+        receipt = f"Receipt - {now}\n" + "\n".join(line for _, line in sale["lines"].values())
         receipt += (
             f"\n\nSubtotal: {total:.2f}\n"
             f"Discount: {discount_amt:.2f}\n"
@@ -534,34 +953,49 @@ class InventorySystem:
         )
         self.last_receipt = receipt
         messagebox.showinfo("Sale Complete", receipt)
-        self.current_sale.clear()
-        self._low_stock_check()
+        self.current_sale = self._new_sale()
+        self._low_stock_check(record["items"])
+
+    # Called on the UI thread once the worker has written a sale: move it from pending to the index
+    # (keeping keys sorted even if a clock change made it older than the last sale)
+    def _index_sale(self, record, offset):
+        for k, s in enumerate(self._pending_sales):
+            if s is record:
+                del self._pending_sales[k]
+                break
+        pos = bisect_right(self._sales_dt_keys, record["datetime"])
+        self._sales_dt_keys.insert(pos, record["datetime"])
+        self._sales_offsets.insert(pos, offset)
+
+    # Sales in datetime order, optionally only those in [start_key, end_key): indexed records streamed
+    # from SALES_FILE, merged with sales still waiting for the I/O worker
+    def _iter_sales(self, start_key=None, end_key=None):
+        keys = self._sales_dt_keys
+        lo = 0 if start_key is None else bisect_left(keys, start_key)
+        hi = len(keys) if end_key is None else bisect_left(keys, end_key)
+        stored = (s for _, s in iter_jsonl(SALES_FILE, self._sales_offsets[lo:hi]))
+        pending = sorted((s for s in self._pending_sales
+                          if (start_key is None or s["datetime"] >= start_key)
+                          and (end_key is None or s["datetime"] < end_key)),
+                         key=sale_key)
+        return heapq.merge(stored, pending, key=sale_key)
 
     # Display history of all past sales with relevant details
     def _view_sales_history(self):
-        top = tk.Toplevel(self.root); top.title("Sales History")
-        canvas = tk.Canvas(top, width=900, height=500)
-        sb     = tk.Scrollbar(top, orient="vertical", command=canvas.yview)
-        frm    = tk.Frame(canvas)
-        frm.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0,0), window=frm, anchor="nw")
-        canvas.configure(yscrollcommand=sb.set)
-        canvas.pack(side="left", fill="both", expand=True)
-        sb.pack(side="right", fill="y")
-
-        for s in sales_history:
+        entries = []
+        for s in self._iter_sales():
             t = s.get("datetime","")
             items = s.get("items", {})
-            items_str = ", ".join(f"{inventory.get(i,{}).get('name',i)} x{q}" for i,q in items.items())
+            items_str = self._items_str(items)
             total = s.get("total", 0.0)
             paid  = s.get("money_given", 0.0)
             ch    = s.get("change_due", 0.0)
-            txt = (
+            entries.append(
                 f"Date: {t}\n"
                 f"Items: {items_str}\n"
                 f"Total: {total:.2f} | Paid: {paid:.2f} | Change: {ch:.2f}\n"
             )
-            tk.Label(frm, text=txt, justify="left").pack(anchor="w", padx=5, pady=5)
+        self._text_window("Sales History", "\n".join(entries))
 
 
     def _print_receipt(self):
@@ -589,20 +1023,24 @@ class InventorySystem:
 
     def _print_direct(self, dlg):
         dlg.destroy()
-        # Create a temporary file to store the receipt content
+        self._io_q.put(("print", self.last_receipt))
+
+    # Runs on the I/O worker: write the receipt to a temporary file and send it to the printer
+    def _print_file(self, text):
         tmp = tempfile.NamedTemporaryFile(delete=False, suffix='.txt')
-        tmp.write(self.last_receipt.encode('utf-8'))
+        tmp.write(text.encode('utf-8'))
         tmp.close()
-        # Create a temporary file to store the receipt content
         if os.name == 'nt':
             os.startfile(tmp.name, 'print')
         else:
-            messagebox.showinfo("Info","Auto-print not supported on this OS. Saved to \"%s\"" % tmp.name)
+            self._io_results.put((messagebox.showinfo,
+                                  ("Info", "Auto-print not supported on this OS. Saved to \"%s\"" % tmp.name)))
 
 
 # --- Entry point ---
 if __name__ == "__main__":
-    login_window(lambda: InventorySystem())
-f
+    root = tk.Tk()
+    root.withdraw()   # Hidden until login succeeds, then reused by InventorySystem
+    login_window(InventorySystem, root)
 
 